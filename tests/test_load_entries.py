@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+'''Excel 読み込み (load_entries) のテスト. python -m unittest discover tests で実行'''
+
+import importlib.util
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('jpo_oa', os.path.join(HERE, '..', '250526_jpo_oa.py'))
+jpo_oa = importlib.util.module_from_spec(spec); spec.loader.exec_module(jpo_oa)
+
+
+class LoadEntriesTest(unittest.TestCase):
+
+    def calamine(self, rows:list)->mock.Mock:
+        """rows を返す偽の python_calamine を差し込み、ブックの Mock を返す"""
+        wb = mock.Mock(); wb.get_sheet_by_index.return_value.iter_rows.return_value = iter(rows)
+        mod = types.ModuleType('python_calamine'); mod.CalamineWorkbook = mock.Mock(from_path=mock.Mock(return_value=wb))
+        p = mock.patch.dict(sys.modules, {'python_calamine': mod}); p.start(); self.addCleanup(p.stop)
+        return wb
+
+    def test_stops_at_blank_a_and_closes_workbook(self):
+        wb = self.calamine([['A', 'B', 'C'], ['1', '2024147578', '2025000001'], ['', '', ''], ['2', '2024147579', '2025000002']])
+        self.assertEqual(jpo_oa.load_entries('in.xlsx'), [('1', '2024147578', '2025000001')])
+        wb.close.assert_called_once_with()
+
+    def test_full_width_number_is_normalized_other_digits_skipped(self):
+        self.calamine([['A', 'B', 'C'], ['1', '２０２４１４７５７８', '2025000001'], ['2', '٢٠٢٤١٤٧٥٧٨', '2025000002']])
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(jpo_oa.load_entries('in.xlsx'), [('1', '2024147578', '2025000001')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+'''OpenAI 応答の解釈・正規化結果キャッシュのテスト. python -m unittest discover tests で実行'''
+
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('jpo_oa', os.path.join(HERE, '..', '250526_jpo_oa.py'))
+jpo_oa = importlib.util.module_from_spec(spec); spec.loader.exec_module(jpo_oa)
+
+RAW = '１．特開２０１４－１７８９２８号公報\n'
+
+
+def reply(content)->mock.Mock:
+    """chat/completions 応答 (message.content に content を JSON 文字列で格納)"""
+    text = content if isinstance(content, str) else json.dumps(content)
+    return mock.Mock(content=json.dumps({'choices': [{'message': {'content': text}}]}).encode())
+
+
+class NormalizeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory(); self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        p = mock.patch.object(jpo_oa, 'CACHE_DIR', tmp.name); p.start(); self.addCleanup(p.stop)
+
+    def post(self, *replies)->mock.Mock:
+        p = mock.patch.object(jpo_oa, 'openai_post', side_effect=list(replies))
+        m = p.start(); self.addCleanup(p.stop)
+        return m
+
+    def group(self, n:int)->list:
+        out = []
+        for i in range(n):
+            folder = os.path.join(self.cache_dir, f'A{i}_202414757{i}')
+            os.makedirs(folder)
+            out.append((folder, f'20250000{i}', f'{i+1}．特開２０１４－１７８９２{i}号公報\n'))
+        return out
+
+    def txt_ids(self, folder:str, pub:str)->list:
+        with open(jpo_oa.pub_txt_path(folder, pub), encoding='utf-8') as f: return f.read().split()[1:]
+
+
+class ParseIdsTest(unittest.TestCase):
+
+    def test_list_is_stripped(self):
+        self.assertEqual(jpo_oa.parse_ids([' JP2014178928A ', '', 'WO2011092813']), ['JP2014178928A', 'WO2011092813'])
+
+    def test_string_is_rejected(self):
+        with self.assertRaises(ValueError): jpo_oa.parse_ids('JP2014178928A')
+
+    def test_missing_is_rejected(self):
+        with self.assertRaises(ValueError): jpo_oa.parse_ids(None)
+
+    def test_reply_must_be_object(self):
+        with self.assertRaises(ValueError): jpo_oa.parse_reply('["JP2014178928A"]')
+
+
+class GptNormalizeTest(NormalizeTestCase):
+
+    def test_result_is_cached(self):
+        m = self.post(reply({'ids': ['JP2014178928A']}))
+        self.assertEqual(jpo_oa.gpt_normalize(RAW, 'k', {}), ['JP2014178928A'])
+        self.assertEqual(jpo_oa.gpt_normalize(RAW, 'k', {}), ['JP2014178928A'])
+        self.assertEqual(m.call_count, 1)
+
+    def test_string_ids_fail_and_are_not_cached(self):
+        self.post(reply({'ids': 'JP1A'}))
+        with self.assertRaises(ValueError): jpo_oa.gpt_normalize(RAW, 'k', {})
+        self.assertIsNone(jpo_oa.cache_get(RAW))
+
+    def test_force_skips_cache(self):
+        jpo_oa.cache_put(RAW, ['JP0000000000A'])
+        self.post(reply({'ids': ['JP2014178928A']}))
+        self.assertEqual(jpo_oa.gpt_normalize(RAW, 'k', {}, force=True), ['JP2014178928A'])
+        self.assertEqual(jpo_oa.cache_get(RAW), ['JP2014178928A'])
+
+    def test_cache_key_follows_model_and_compacted_text(self):
+        base = jpo_oa.cache_path(RAW)
+        with mock.patch.object(jpo_oa, 'OPENAI_MODEL', 'other-model'):
+            self.assertNotEqual(jpo_oa.cache_path(RAW), base)
+        self.assertEqual(jpo_oa.cache_path('前文\n'+RAW), base)  # 送信しない行の違いは同一キー
+
+
+class AppendGroupTest(NormalizeTestCase):
+
+    def test_ids_map_back_to_folders(self):
+        g = self.group(2)
+        self.post(reply({'0': ['JP2014178920A'], '1': ['JP2014178921A']}))
+        jpo_oa.append_group(g, 'k', {})
+        self.assertEqual(self.txt_ids(*g[1][:2]), ['JP2014178921A'])
+        self.assertEqual(jpo_oa.cache_get(g[0][2]), ['JP2014178920A'])
+
+    def test_missing_id_is_retried_alone_not_cached_empty(self):
+        g = self.group(2)
+        m = self.post(reply({'0': ['JP2014178920A']}), reply({'ids': ['JP2014178921A']}))
+        jpo_oa.append_group(g, 'k', {})
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(jpo_oa.cache_get(g[1][2]), ['JP2014178921A'])
+        self.assertEqual(self.txt_ids(*g[1][:2]), ['JP2014178921A'])
+
+    def test_unexpected_keys_cache_nothing(self):
+        g = self.group(2)
+        self.post(reply({'ID 0': ['JP2014178920A'], 'ID 1': []}), RuntimeError('down'), RuntimeError('down'))
+        jpo_oa.append_group(g, 'k', {})
+        self.assertIsNone(jpo_oa.cache_get(g[0][2])); self.assertIsNone(jpo_oa.cache_get(g[1][2]))
+
+
+class BatchNormalizeTest(NormalizeTestCase):
+
+    def session(self, files:dict):
+        """GET /files/<id>/content に files[id] (dict の list) を JSONL で返すセッション"""
+        def get(url, **kw):
+            lines = files[url.split('/')[-2]]
+            return mock.MagicMock(iter_lines=lambda: [json.dumps(x).encode() for x in lines])
+        p = mock.patch.object(jpo_oa, 'get_session', return_value=mock.Mock(get=get)); p.start(); self.addCleanup(p.stop)
+
+    def created(self, **batch)->mock.Mock:
+        return mock.Mock(content=json.dumps(dict(id='batch_1', status='completed', **batch)).encode())
+
+    def test_failed_entries_are_logged_and_retried_synchronously(self):
+        g = self.group(2)
+        ok = {'custom_id': g[0][0], 'response': {'status_code': 200, 'body': json.loads(reply({'ids': ['JP2014178920A']}).content)}}
+        ng = {'custom_id': g[1][0], 'response': {'status_code': 400, 'body': {'error': 'bad'}}}
+        self.session({'out': [ok], 'err': [ng]})
+        m = self.post(mock.Mock(content=b'{"id": "file_1"}'), self.created(output_file_id='out', error_file_id='err'),
+                      reply({'ids': ['JP2014178921A']}))
+        with self.assertLogs(level='ERROR') as cm:
+            jpo_oa.append_all_citations(g, 'k', {}, use_batch=True)
+        self.assertTrue(any(g[1][0] in ln for ln in cm.output))
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(self.txt_ids(*g[0][:2]), ['JP2014178920A'])
+        self.assertEqual(self.txt_ids(*g[1][:2]), ['JP2014178921A'])
+
+    def test_no_output_file_falls_back_for_all(self):
+        g = self.group(2)
+        self.session({})
+        m = self.post(mock.Mock(content=b'{"id": "file_1"}'), self.created(),
+                      reply({'0': ['JP2014178920A'], '1': ['JP2014178921A']}))
+        jpo_oa.append_all_citations(g, 'k', {}, use_batch=True)
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(self.txt_ids(*g[1][:2]), ['JP2014178921A'])
+
+
+class WriteCitationsTest(NormalizeTestCase):
+
+    def test_only_new_ids_are_appended(self):
+        folder, pub, _ = self.group(1)[0]
+        jpo_oa.write_citations(folder, pub, ['JP2014178928A', 'WO2011092813'])
+        jpo_oa.write_citations(folder, pub, ['jp2014178928a', 'ＷＯ２０１１０９２８１３', 'US20150183083A1'])
+        self.assertEqual(self.txt_ids(folder, pub), ['JP2014178928A', 'WO2011092813', 'US20150183083A1'])
+
+    def test_existing_file_without_trailing_newline(self):
+        folder, pub, _ = self.group(1)[0]
+        with open(jpo_oa.pub_txt_path(folder, pub), 'w', encoding='utf-8') as f: f.write(f'JP{pub}A\nJP2014178928A')
+        jpo_oa.write_citations(folder, pub, ['JP2014178928A', 'WO2011092813'])
+        self.assertEqual(self.txt_ids(folder, pub), ['JP2014178928A', 'WO2011092813'])
+
+    def test_non_ascii_lines_are_normalized(self):
+        folder, pub, _ = self.group(1)[0]
+        with open(jpo_oa.pub_txt_path(folder, pub), 'w', encoding='utf-8') as f: f.write(f'JP{pub}A\nＪＰ２０１４１７８９２８Ａ\u200b\n')
+        jpo_oa.write_citations(folder, pub, ['JP2014178928A'])
+        self.assertEqual(len(self.txt_ids(folder, pub)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+'''XML → 引用抽出 (scan_xml_citations) のテスト. python -m unittest discover tests で実行'''
+
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('jpo_oa', os.path.join(HERE, '..', '250526_jpo_oa.py'))
+jpo_oa = importlib.util.module_from_spec(spec); spec.loader.exec_module(jpo_oa)
+
+INLINE_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<jp:notice xmlns:jp="http://www.jpo.go.jp">
+<jp:paragraph>＜<b>引用文献</b>等一覧＞</jp:paragraph>
+<jp:paragraph>１．特開<u>２０１４</u>－１７８９２８号公報</jp:paragraph>
+<jp:paragraph>２．特開平<sub>７</sub>－１６８９９４号公報</jp:paragraph>
+<jp:paragraph>＜先行技術文献調査結果の記録＞</jp:paragraph>
+</jp:notice>
+'''
+
+SJIS_XML = '''<?xml version="1.0" encoding="Shift_JIS"?>
+<notice><p>＜引用文献等一覧＞</p><p>１．国際公開第２０１１／０９２８１３号（①参照）</p><p>＜先行技術文献調査結果の記録＞</p></notice>
+'''
+
+UNCLOSED_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<notice><p>＜引用文献等一覧＞</p><p>１．特開２０１４－１７８９２８号公報
+'''
+
+
+class ScanXmlCitationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text:str, enc:str='utf-8')->str:
+        path = os.path.join(self.tmp.name, 'oa.xml')
+        with open(path, 'wb') as f: f.write(text.encode(enc))
+        return path
+
+    def test_inline_markup_does_not_split_lines(self):
+        seg = jpo_oa.scan_xml_citations(self.write(INLINE_XML))
+        lines = [ln for ln in seg.split('\n') if ln.strip()]
+        self.assertEqual(lines, ['＞', '１．特開２０１４－１７８９２８号公報', '２．特開平７－１６８９９４号公報', '＜'])
+
+    def test_shift_jis_declaration(self):
+        seg = jpo_oa.scan_xml_citations(self.write(SJIS_XML, 'cp932'))
+        self.assertIn('１．国際公開第２０１１／０９２８１３号（①参照）', seg)
+
+    def test_unclosed_element_is_recovered(self):
+        seg = jpo_oa.scan_xml_citations(self.write(UNCLOSED_XML))
+        self.assertIn('１．特開２０１４－１７８９２８号公報', seg)
+
+    def test_text_around_comments_is_kept(self):
+        path = self.write('<r><p>A<!--c-->B<x/>C<?pi z?>D</p><p>E<!--c-->F</p></r>')
+        self.assertEqual(''.join(jpo_oa.iter_xml_texts(path)), 'ABCD\nEF\n')
+
+    def test_file_is_closed_after_early_return(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always', ResourceWarning)
+            jpo_oa.scan_xml_citations(self.write(INLINE_XML)); gc.collect()
+        self.assertEqual([x for x in w if issubclass(x.category, ResourceWarning)], [])
+
+    def test_no_section_returns_none(self):
+        self.assertIsNone(jpo_oa.scan_xml_citations(self.write('<notice><p>本文</p></notice>')))
+
+    def test_without_lxml_falls_back_to_text_search(self):
+        with mock.patch.dict(sys.modules, {'lxml': None}):
+            seg = jpo_oa.scan_xml_citations(self.write(SJIS_XML, 'cp932'))
+        self.assertIn('１．国際公開第２０１１／０９２８１３号', seg)
+
+
+if __name__ == '__main__':
+    unittest.main()
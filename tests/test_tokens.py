@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''JPO トークン管理 (TokenManager) とダウンロード時の再認証のテスト. python -m unittest discover tests で実行'''
+
+import importlib.util
+import io
+import os
+import tempfile
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('jpo_oa', os.path.join(HERE, '..', '250526_jpo_oa.py'))
+jpo_oa = importlib.util.module_from_spec(spec); spec.loader.exec_module(jpo_oa)
+
+
+def token(name:str, ttl:float=3600)->tuple:
+    return (f'{name}-access', f'{name}-refresh', time.time()+ttl, time.time()+86400)
+
+
+def response(status:int, body:bytes=b'', ctype:str='application/json')->mock.MagicMock:
+    r = mock.MagicMock(status_code=status, ok=status<400, headers={'Content-Type': ctype})
+    r.__enter__.return_value = r
+    r.iter_content.return_value = [body]
+    r.raw.read.return_value = body[:300]
+    return r
+
+
+class TokenTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory(); self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        p = mock.patch.object(jpo_oa, 'CONFIG_PATH', os.path.join(tmp.name, 'config.json')); p.start(); self.addCleanup(p.stop)
+
+    def patch(self, name:str, **kw)->mock.Mock:
+        p = mock.patch.object(jpo_oa, name, **kw); m = p.start(); self.addCleanup(p.stop)
+        return m
+
+
+class ObtainTest(TokenTestCase):
+
+    def saved(self, tok:tuple, user:str='u'):
+        jpo_oa.TokenManager(user, 'p', tok, {}).save()
+
+    def test_valid_saved_token_is_used_without_network(self):
+        self.saved(token('saved'))
+        refresh = self.patch('refresh_token'); login = self.patch('get_tokens')
+        self.assertEqual(jpo_oa.TokenManager.obtain('u', 'p', {}).get(), 'saved-access')
+        refresh.assert_not_called(); login.assert_not_called()
+
+    def test_expired_access_uses_refresh_token(self):
+        self.saved(token('saved', ttl=60))  # TOKEN_MARGIN 未満
+        refresh = self.patch('refresh_token', return_value=token('refreshed')); login = self.patch('get_tokens')
+        self.assertEqual(jpo_oa.TokenManager.obtain('u', 'p', {}).get(), 'refreshed-access')
+        refresh.assert_called_once_with('saved-refresh', {}); login.assert_not_called()
+        self.assertEqual(jpo_oa.load_config()['access_token'], 'refreshed-access')
+
+    def test_rejected_refresh_falls_back_to_password(self):
+        self.saved(token('saved', ttl=60))
+        self.patch('refresh_token', side_effect=RuntimeError('invalid_grant'))
+        login = self.patch('get_tokens', return_value=token('login'))
+        self.assertEqual(jpo_oa.TokenManager.obtain('u', 'p', {}).get(), 'login-access')
+        login.assert_called_once_with('u', 'p', {})
+
+    def test_expired_refresh_token_is_not_tried(self):
+        self.saved(token('saved', ttl=60)[:3] + (time.time()+60,))  # REFRESH_MARGIN 未満
+        refresh = self.patch('refresh_token'); self.patch('get_tokens', return_value=token('login'))
+        jpo_oa.TokenManager.obtain('u', 'p', {})
+        refresh.assert_not_called()
+
+    def test_other_user_logs_in(self):
+        self.saved(token('saved'), user='someone-else')
+        login = self.patch('get_tokens', return_value=token('login'))
+        self.assertEqual(jpo_oa.TokenManager.obtain('u', 'p', {}).get(), 'login-access')
+        login.assert_called_once_with('u', 'p', {})
+
+
+class RenewTest(TokenTestCase):
+
+    def test_rejected_token_is_cleared_and_refreshed(self):
+        self.patch('refresh_token', return_value=token('new'))
+        tm = jpo_oa.TokenManager('u', 'p', token('old'), {}); tm.save()
+        tm.renew('old-access')
+        self.assertEqual(tm.get(), 'new-access')
+        self.assertEqual(jpo_oa.load_config()['access_token'], 'new-access')
+
+    def test_falls_back_to_password_when_refresh_fails(self):
+        self.patch('refresh_token', side_effect=RuntimeError('invalid_grant'))
+        login = self.patch('get_tokens', return_value=token('login'))
+        tm = jpo_oa.TokenManager('u', 'p', token('old'), {})
+        tm.renew('old-access')
+        login.assert_called_once_with('u', 'p', {})
+        self.assertEqual(tm.get(), 'login-access')
+
+    def test_already_renewed_by_other_thread(self):
+        refresh = self.patch('refresh_token')
+        tm = jpo_oa.TokenManager('u', 'p', token('new'), {})
+        tm.renew('old-access')
+        refresh.assert_not_called()
+
+    def test_stored_token_is_dropped_even_if_renewal_fails(self):
+        self.patch('refresh_token', side_effect=RuntimeError('down'))
+        self.patch('get_tokens', side_effect=RuntimeError('down'))
+        tm = jpo_oa.TokenManager('u', 'p', token('old'), {}); tm.save()
+        with self.assertRaises(RuntimeError): tm.renew('old-access')
+        self.assertNotIn('access_token', jpo_oa.load_config())
+
+
+class DownloadXmlTest(TokenTestCase):
+
+    def zip_bytes(self)->bytes:
+        bio = io.BytesIO()
+        with zipfile.ZipFile(bio, 'w') as zf: zf.writestr('oa.xml', '<notice/>')
+        return bio.getvalue()
+
+    def test_401_renews_once_and_retries(self):
+        get = mock.Mock(side_effect=[response(401), response(200, self.zip_bytes(), 'application/zip')])
+        self.patch('get_session', return_value=mock.Mock(get=get))
+        self.patch('refresh_token', return_value=token('new'))
+        tm = jpo_oa.TokenManager('u', 'p', token('old'), {})
+        jpo_oa.download_xml(tm, '2024147578', {}, self.tmp)
+        self.assertEqual(get.call_args.kwargs['headers']['Authorization'], 'Bearer new-access')
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, 'oa.xml')))
+
+    def test_second_401_gives_up(self):
+        get = mock.Mock(side_effect=[response(401), response(401)])
+        self.patch('get_session', return_value=mock.Mock(get=get))
+        refresh = self.patch('refresh_token', return_value=token('new'))
+        tm = jpo_oa.TokenManager('u', 'p', token('old'), {})
+        with self.assertLogs(level='WARNING') as cm:
+            jpo_oa.download_xml(tm, '2024147578', {}, self.tmp)
+        self.assertEqual(refresh.call_count, 1)
+        self.assertTrue(any('ダウンロード失敗: 401' in ln for ln in cm.output))
+
+
+if __name__ == '__main__':
+    unittest.main()